@@ -1,12 +1,27 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from app.routes.upload import router as upload_router
+from app.pipelines.batcher import ner_batcher
+from app.pipelines.ner import get_nlp
+from app.pipelines.pdf import get_embeddings
 
 
-app = FastAPI(title="Document Processing Pipeline")
+# orjson serializes numpy scalars natively, so responses no longer need a
+# pre-pass converting np.float32 values to float.
+app = FastAPI(title="Document Processing Pipeline", default_response_class=ORJSONResponse)
 
 app.include_router(upload_router, prefix="/api")
 
 
+@app.on_event("startup")
+async def warm_models():
+    # Load the NER and embedding models once at startup so the first
+    # upload doesn't pay the multi-second model loads.
+    get_nlp()
+    get_embeddings()
+    ner_batcher.start()
+
+
 @app.get("/")
 async def root():
     return {"status": "ok", "message": "Document Pipeline is running"}
@@ -0,0 +1,59 @@
+import asyncio
+
+from app.pipelines.ner import run_ner, run_ner_batch
+
+MAX_BATCH = 16
+MAX_WAIT = 0.01  # seconds to wait for more requests before running
+
+
+class NERBatcher:
+    """
+    Collects concurrent txt-upload texts and runs them through the NER
+    model as one batched forward instead of batch=1 per request. Pending
+    requests are queued; a background task drains up to MAX_BATCH items
+    (waiting at most MAX_WAIT for stragglers) and resolves each caller's
+    future with its own result.
+    """
+
+    def __init__(self, max_batch: int = MAX_BATCH, max_wait: float = MAX_WAIT):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue = None
+        self._task = None
+
+    def start(self):
+        self.queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._loop())
+
+    async def submit(self, text: str):
+        if self._task is None:
+            # Batcher not started (e.g. called outside the app); run directly.
+            return await asyncio.to_thread(run_ner, text_content=text)
+        fut = asyncio.get_running_loop().create_future()
+        await self.queue.put((text, fut))
+        return await fut
+
+    async def _loop(self):
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(
+                        await asyncio.wait_for(self.queue.get(), timeout=self.max_wait)
+                    )
+                except asyncio.TimeoutError:
+                    break
+
+            texts = [text for text, _ in batch]
+            try:
+                results = await asyncio.to_thread(run_ner_batch, texts)
+                for (_, fut), result in zip(batch, results):
+                    if not fut.done():
+                        fut.set_result(result)
+            except Exception as e:
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+
+
+ner_batcher = NERBatcher()
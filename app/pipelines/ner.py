@@ -1,28 +1,137 @@
 
+import calendar
+import os
 import re, json, sys
-from datetime import datetime
+import threading
+from datetime import datetime, date
 import numpy as np
 
+_NLP = None
+_NLP_LOADED = False
+_NLP_LOCK = threading.Lock()
+
+# Distilled checkpoint by default: 6 layers instead of 12 for ~2x the
+# speed at ~97% of bert-base-NER's accuracy, and the finance regex layer
+# merged on top catches the domain-specific fields anyway. Override with
+# NER_MODEL=dslim/bert-base-NER to get the old model back.
+NER_MODEL = os.environ.get("NER_MODEL", "elastic/distilbert-base-cased-finetuned-conll03-english")
+
+# Patterns are compiled once at import time; regex_finance and friends run
+# on every document, so per-call re.compile cache lookups add up.
+_WORDY_DATE_RE = re.compile(r"(\d{1,2})\s+([A-Za-z]+)\s+(\d{2,4})")
+# One pattern for every date shape normalize_date used to probe with six
+# sequential strptime calls (and five expected exceptions per call).
+_DATE_PARTS_RE = re.compile(
+    r"^(?:(\d{1,2})/(\d{1,2})/(\d{2,4})"
+    r"|(\d{1,2})\s+([A-Za-z]+)\s+(\d{2,4})"
+    r"|(\d{4})-(\d{2})-(\d{2}))$"
+)
+_MONTH_NUMBERS = {
+    name.lower(): i
+    for i in range(1, 13)
+    for name in (calendar.month_name[i], calendar.month_abbr[i])
+}
+_CURRENCY_RE = re.compile(r"\b([A-Z]{3})\b")
+_AMOUNT_RE = re.compile(r"([0-9]+(?:\.[0-9]+)?)")
+_MILLION_RE = re.compile(r"\b(mio|million|mn)\b", re.I)
+_BILLION_RE = re.compile(r"\b(bn|billion)\b", re.I)
+_ISIN_RE = re.compile(r"\b([A-Z]{2}[A-Z0-9]{9}[0-9])\b")
+_NOTIONAL_RE = re.compile(r"\b([A-Z]{3})?\s*([0-9]+(?:\.[0-9]+)?)\s*(mio|million|mn|bn|billion)\b", re.I)
+_FREQUENCY_RE = re.compile(r"\b(Quarterly|Monthly|Semi[- ]?annual|Semiannual|Annually|Annual|Bi[- ]?weekly|Weekly)\b", re.I)
+_SPREAD_RE = re.compile(r"\b([a-z]{3,5}\s*\+\s*\d+\s*bps)\b", re.I)
+_SLASH_DATE_RE = re.compile(r"\b(\d{1,2}/\d{1,2}/\d{2,4})\b")
+_FLOAT_UNDERLYING_RE = re.compile(r"\b([A-Z0-9]{3,})\s+FLOAT\b")
+_UNDERLYING_KV_RE = re.compile(r"Underlying\s*[:\-]\s*([^\n\r]+)", re.I)
+_BANK_RE = re.compile(r"\b(BANK\s+[A-Z]+)\b")
+_WS_RE = re.compile(r"\s+")
+
+def try_load_onnx():
+    try:
+        from app.pipelines.ner_onnx import MODEL_DIR, OnnxNER
+        if not os.path.isdir(MODEL_DIR):
+            return None
+        return OnnxNER(MODEL_DIR)
+    except Exception:
+        return None
+
 def try_load_hf():
     try:
+        import torch
         from transformers import pipeline
-        nlp = pipeline("ner", model="dslim/bert-base-NER", aggregation_strategy="simple")
-        return nlp
+        torch.set_num_threads(os.cpu_count() or 1)
+        nlp = pipeline("ner", model=NER_MODEL, aggregation_strategy="simple")
+        nlp.model.eval()
+
+        def run(text):
+            with torch.inference_mode():
+                if isinstance(text, list):
+                    # Without an explicit batch_size the pipeline iterates
+                    # a list with batch=1 forwards; pad to one real batch.
+                    res = nlp(text, batch_size=len(text))
+                else:
+                    res = nlp(text)
+            # The torch pipeline emits np.float32 scores, which FastAPI's
+            # jsonable_encoder rejects (np.float32 is not a float subclass);
+            # coerce them here so results serialize like the ONNX backend's.
+            for entities in res if isinstance(text, list) else [res]:
+                for r in entities:
+                    r["score"] = float(r["score"])
+            return res
+        return run
     except Exception:
         return None
 
+def get_nlp():
+    """
+    Returns the shared NER backend, loading it at most once per process.
+    Prefers the quantized ONNX model when its export directory exists,
+    otherwise falls back to the HF torch pipeline. Loading takes several
+    seconds, so this must never happen inside a request after the first.
+    """
+    global _NLP, _NLP_LOADED
+    if _NLP_LOADED:
+        return _NLP
+    with _NLP_LOCK:
+        if not _NLP_LOADED:
+            _NLP = try_load_onnx() or try_load_hf()
+            _NLP_LOADED = True
+    return _NLP
+
+def _fix_year(y):
+    # Same windowing the old strptime loop produced: two-digit years land
+    # in 1970-2068, and any year before 1970 is pushed forward a century.
+    if y < 100:
+        y += 2000 if y < 70 else 1900
+    if y < 1970:
+        y += 100
+    return y
+
 def normalize_date(s):
     s = s.strip()
-    fmts = ["%m/%d/%y","%m/%d/%Y","%d/%m/%Y","%d %B %Y","%d %b %Y","%Y-%m-%d"]
-    for f in fmts:
+    m = _DATE_PARTS_RE.match(s)
+    if m:
         try:
-            dt = datetime.strptime(s, f).date()
-            if dt.year < 1970:
-                dt = dt.replace(year=dt.year + 100)
-            return dt.isoformat()
-        except Exception:
-            pass
-    m = re.match(r"(\d{1,2})\s+([A-Za-z]+)\s+(\d{2,4})", s)
+            if m.group(1):
+                mon, d, y = int(m.group(1)), int(m.group(2)), _fix_year(int(m.group(3)))
+                if mon > 12 and d <= 12:  # day-first input
+                    mon, d = d, mon
+            elif m.group(4):
+                mon = _MONTH_NUMBERS.get(m.group(5).lower())
+                if mon is None:
+                    return s
+                d, y = int(m.group(4)), int(m.group(6))
+                # two-digit wordy years were always read as 20xx
+                if y < 100:
+                    y += 2000
+                elif y < 1970:
+                    y += 100
+            else:
+                y, mon, d = int(m.group(7)), int(m.group(8)), int(m.group(9))
+                y = _fix_year(y)
+            return date(y, mon, d).isoformat()
+        except ValueError:
+            return s
+    m = _WORDY_DATE_RE.match(s)
     if m:
         d, mon, y = m.groups()
         y = "20"+y if len(y)==2 else y
@@ -36,45 +145,49 @@ def normalize_date(s):
 def parse_money_span(span):
     s = span.replace(",", "")
     cur = None
-    mcur = re.search(r"\b([A-Z]{3})\b", s)
+    mcur = _CURRENCY_RE.search(s)
     if mcur: cur = mcur.group(1)
-    mamt = re.search(r"([0-9]+(?:\.[0-9]+)?)", s)
+    mamt = _AMOUNT_RE.search(s)
     amount = float(mamt.group(1)) if mamt else None
     unit = None
-    if re.search(r"\b(mio|million|mn)\b", s, re.I): unit = "million"
-    elif re.search(r"\b(bn|billion)\b", s, re.I): unit = "billion"
+    if _MILLION_RE.search(s): unit = "million"
+    elif _BILLION_RE.search(s): unit = "billion"
     return {"amount": amount, "currency": cur, "unit": unit}
 
 def regex_finance(text):
     ent = {}
-    m = re.search(r"\b([A-Z]{2}[A-Z0-9]{9}[0-9])\b", text)
+    m = _ISIN_RE.search(text)
     if m: ent["ISIN"] = m.group(1)
-    m = re.search(r"\b([A-Z]{3})?\s*([0-9]+(?:\.[0-9]+)?)\s*(mio|million|mn|bn|billion)\b", text, re.I)
+    m = _NOTIONAL_RE.search(text)
     if m:
         cur = m.group(1).upper() if m.group(1) else None
         amt = float(m.group(2))
         unit = "million" if m.group(3).lower() in ["mio","million","mn"] else "billion"
         ent["Notional"] = {"amount": amt, "currency": cur, "unit": unit}
-    m = re.search(r"\b(Quarterly|Monthly|Semi[- ]?annual|Semiannual|Annually|Annual|Bi[- ]?weekly|Weekly)\b", text, re.I)
+    m = _FREQUENCY_RE.search(text)
     if m: ent["PaymentFrequency"] = m.group(1).capitalize()
-    m = re.search(r"\b([a-z]{3,5}\s*\+\s*\d+\s*bps)\b", text, re.I)
-    if m: ent["Coupon/Spread"] = re.sub(r"\s+", "", m.group(1))
-    m = re.search(r"\b(\d{1,2}/\d{1,2}/\d{2,4})\b", text)
+    m = _SPREAD_RE.search(text)
+    if m: ent["Coupon/Spread"] = _WS_RE.sub("", m.group(1))
+    m = _SLASH_DATE_RE.search(text)
     if m: ent["Date"] = normalize_date(m.group(1))
-    m = re.search(r"\b([A-Z0-9]{3,})\s+FLOAT\b", text)
+    m = _FLOAT_UNDERLYING_RE.search(text)
     if m: ent["Underlying"] = m.group(1)
-    m = re.search(r"Underlying\s*[:\-]\s*([^\n\r]+)", text, re.I)
+    m = _UNDERLYING_KV_RE.search(text)
     if m and "Underlying" not in ent: ent["Underlying"] = m.group(1).strip()
-    m = re.search(r"\b(BANK\s+[A-Z]+)\b", text)
+    m = _BANK_RE.search(text)
     if m: ent["Counterparty"] = m.group(1)
     return ent
 
 def map_hf_to_schema(hf_results, text):
     mapped = {"_raw_ner": hf_results}
-    orgs = [r for r in hf_results if r.get("entity_group") == "ORG"]
-    dates = [r for r in hf_results if r.get("entity_group") == "DATE"]
-    money = [r for r in hf_results if r.get("entity_group") == "MONEY"]
-    prods = [r for r in hf_results if r.get("entity_group") in ("MISC","PRODUCT")]
+    # One pass over the results, dispatching into per-group buckets,
+    # instead of four filtering traversals.
+    orgs, dates, money, prods = [], [], [], []
+    buckets = {"ORG": orgs, "DATE": dates, "MONEY": money, "MISC": prods, "PRODUCT": prods}
+    for r in hf_results:
+        bucket = buckets.get(r.get("entity_group"))
+        if bucket is not None:
+            bucket.append(r)
     if orgs:
         org = max(orgs, key=lambda r: len(r["word"]))
         mapped["Counterparty"] = org["word"].strip()
@@ -84,7 +197,7 @@ def map_hf_to_schema(hf_results, text):
     if money:
         span = money[0]["word"]
         mapped["Notional"] = parse_money_span(span)
-    m = re.search(r"\b([A-Z0-9]{3,})\s+FLOAT\b", text)
+    m = _FLOAT_UNDERLYING_RE.search(text)
     if m:
         mapped["Underlying"] = m.group(1)
     elif prods:
@@ -100,15 +213,16 @@ def merge_dicts(a, b):
             out[k] = v
     return out
 
-def convert_float32_to_float(obj):
-    if isinstance(obj, np.float32):
+def _np_default(obj):
+    # json.dump fallback for numpy scalars/arrays in the NER output;
+    # the HTTP path handles these natively via ORJSONResponse.
+    if isinstance(obj, np.floating):
         return float(obj)
-    elif isinstance(obj, dict):
-        return {k: convert_float32_to_float(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [convert_float32_to_float(elem) for elem in obj]
-    else:
-        return obj
+    if isinstance(obj, np.integer):
+        return int(obj)
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
 
 def run_ner(file_path=None, text_content=None, out_path=None):
     if file_path:
@@ -122,10 +236,10 @@ def run_ner(file_path=None, text_content=None, out_path=None):
     else:
         raise ValueError("Either file_path or text_content must be provided")
 
-    nlp = try_load_hf()
+    nlp = get_nlp()
     engine = "huggingface" if nlp else "regex"
     base = {}
-    
+
     if nlp:
         try:
             hf_res = nlp(text)
@@ -135,14 +249,37 @@ def run_ner(file_path=None, text_content=None, out_path=None):
             engine = "regex"
             base = {}
 
-    regex_res = regex_finance(text)
-    result = merge_dicts(base, regex_res)
-    result["_engine"] = engine
-    result = convert_float32_to_float(result)
+    result = _finish_result(text, base, engine)
 
     if out_path:
         with open(out_path, "w", encoding="utf-8") as f:
-            json.dump(result, f, indent=2, ensure_ascii=False)
+            json.dump(result, f, indent=2, ensure_ascii=False, default=_np_default)
 
     return result
 
+def run_ner_batch(texts):
+    """
+    Runs NER over several documents in one model forward and returns one
+    result dict per input, matching run_ner(text_content=...).
+    """
+    nlp = get_nlp()
+    if nlp:
+        try:
+            all_hf = nlp(list(texts))
+            return [
+                _finish_result(text, map_hf_to_schema(all_hf[i], text), "huggingface")
+                for i, text in enumerate(texts)
+            ]
+        except Exception as e:
+            print(f"Hugging Face pipeline error: {e}")
+    # The batched forward failed (e.g. one oversized text): retry each
+    # text on its own so one bad input doesn't degrade its co-batched
+    # neighbours — run_ner falls back to regex per text as needed.
+    return [run_ner(text_content=text) for text in texts]
+
+def _finish_result(text, base, engine):
+    regex_res = regex_finance(text)
+    result = merge_dicts(base, regex_res)
+    result["_engine"] = engine
+    return result
+
@@ -0,0 +1,139 @@
+"""
+ONNX Runtime backend for the NER pipeline.
+
+The model directory is produced offline once:
+
+    optimum-cli export onnx --model <NER checkpoint> --task token-classification models/ner-onnx
+    python -m app.pipelines.ner_onnx models/ner-onnx
+
+The second step writes model-int8.onnx (dynamic int8 quantization). At
+runtime `OnnxNER` loads the int8 model if present, otherwise the fp32
+export, and reproduces the output shape of the HF pipeline with
+aggregation_strategy="simple" so `map_hf_to_schema` is unchanged.
+"""
+
+import json
+import os
+import sys
+
+import numpy as np
+
+MODEL_DIR = os.environ.get("NER_ONNX_DIR", "models/ner-onnx")
+
+
+def _softmax(x, axis=-1):
+    x = x - x.max(axis=axis, keepdims=True)
+    e = np.exp(x)
+    return e / e.sum(axis=axis, keepdims=True)
+
+
+class OnnxNER:
+    """
+    Drop-in replacement for pipeline("ner", ..., aggregation_strategy="simple")
+    backed by an onnxruntime InferenceSession.
+    """
+
+    def __init__(self, model_dir: str = MODEL_DIR):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_path = os.path.join(model_dir, "model-int8.onnx")
+        if not os.path.exists(model_path):
+            model_path = os.path.join(model_dir, "model.onnx")
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        opts.intra_op_num_threads = os.cpu_count() or 1
+        self.session = ort.InferenceSession(
+            model_path, opts, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+
+        with open(os.path.join(model_dir, "config.json"), "r", encoding="utf-8") as f:
+            config = json.load(f)
+        self.id2label = {int(k): v for k, v in config["id2label"].items()}
+
+    def __call__(self, text):
+        if isinstance(text, (list, tuple)):
+            return self._run(list(text))
+        return self._run([text])[0]
+
+    def _run(self, texts):
+        enc = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            return_offsets_mapping=True,
+            return_tensors="np",
+        )
+        offsets = enc.pop("offset_mapping")
+        mask = enc["attention_mask"]
+        inputs = {k: v for k, v in enc.items() if k in self.input_names}
+        logits = self.session.run(None, inputs)[0]
+        probs = _softmax(logits)
+        label_ids = probs.argmax(axis=-1)
+        scores = np.take_along_axis(probs, label_ids[..., None], axis=-1)[..., 0]
+        return [
+            self._aggregate(
+                text,
+                offsets[i][mask[i] == 1],
+                label_ids[i][mask[i] == 1],
+                scores[i][mask[i] == 1],
+            )
+            for i, text in enumerate(texts)
+        ]
+
+    def _aggregate(self, text, offsets, label_ids, scores):
+        # BIO -> spans, matching aggregation_strategy="simple": a B- tag
+        # starts a span, I- of the same type extends it, anything else ends it.
+        entities = []
+        cur = None
+        for (start, end), label_id, score in zip(offsets, label_ids, scores):
+            if start == end:  # special token
+                continue
+            label = self.id2label[int(label_id)]
+            if label == "O":
+                cur = self._flush(entities, cur, text)
+                continue
+            prefix, group = label.split("-", 1)
+            if cur is not None and cur["entity_group"] == group and prefix == "I":
+                cur["end"] = int(end)
+                cur["scores"].append(float(score))
+            else:
+                cur = self._flush(entities, cur, text)
+                cur = {
+                    "entity_group": group,
+                    "start": int(start),
+                    "end": int(end),
+                    "scores": [float(score)],
+                }
+        self._flush(entities, cur, text)
+        return entities
+
+    @staticmethod
+    def _flush(entities, cur, text):
+        if cur is not None:
+            entities.append({
+                "entity_group": cur["entity_group"],
+                "score": float(np.mean(cur["scores"])),
+                "word": text[cur["start"]:cur["end"]],
+                "start": cur["start"],
+                "end": cur["end"],
+            })
+        return None
+
+
+def quantize(model_dir: str = MODEL_DIR):
+    """Write model-int8.onnx next to the fp32 export."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(
+        os.path.join(model_dir, "model.onnx"),
+        os.path.join(model_dir, "model-int8.onnx"),
+        weight_type=QuantType.QInt8,
+    )
+
+
+if __name__ == "__main__":
+    quantize(sys.argv[1] if len(sys.argv) > 1 else MODEL_DIR)
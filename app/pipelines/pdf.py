@@ -1,10 +1,15 @@
 import pdfplumber
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
 from typing import List, Dict
 from langchain.vectorstores import FAISS as LangchainFAISS
 from langchain.embeddings import HuggingFaceEmbeddings
 from openai import OpenAI
 import os
 import json
+import threading
 from dotenv import load_dotenv
 
 
@@ -15,33 +20,117 @@ client = OpenAI(
 )
 
 
-CHUNK_SIZE = 500  
-TOP_K = 3         
-
-
-def pdf_to_text(pdf_path: str) -> str:
-    text = ""
-    with pdfplumber.open(pdf_path) as pdf:
+CHUNK_SIZE = 500
+CHUNK_OVERLAP = 50
+TOP_K = 3
+
+# Prefix of the answer string run_rag_extraction returns when the LLM
+# call fails, so callers can tell failures from real answers.
+LLM_ERROR_PREFIX = "Groq LLM request failed"
+
+
+def pdf_to_text(pdf_source) -> str:
+    # pdf_source can be a path or a file-like object; both backends accept
+    # either, so uploads never have to be copied to a named tmp file.
+    # pypdfium2 (native PDFium) is an order of magnitude faster than the
+    # pure-Python pdfplumber stack for plain text; fall back to pdfplumber
+    # when it isn't installed.
+    if pdfium is not None:
+        pdf = pdfium.PdfDocument(pdf_source)
+        try:
+            return "\n".join(page.get_textpage().get_text_range() for page in pdf)
+        finally:
+            pdf.close()
+    parts = []
+    with pdfplumber.open(pdf_source) as pdf:
         for page in pdf.pages:
-            page_text = page.extract_text() or ""
-            text += page_text + "\n"
-    return text
+            parts.append(page.extract_text() or "")
+    return "\n".join(parts)
 
 
-def chunk_text(text: str, chunk_size: int = CHUNK_SIZE) -> List[str]:
+def chunk_text(text: str, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP) -> List[str]:
+    # Sliding window with overlap so entities spanning a chunk boundary
+    # still land intact in at least one chunk.
     words = text.split()
+    stride = max(chunk_size - overlap, 1)
     chunks = []
-    for i in range(0, len(words), chunk_size):
+    for i in range(0, len(words), stride):
         chunk = " ".join(words[i:i + chunk_size])
         chunks.append(chunk)
+        if i + chunk_size >= len(words):
+            break
     return chunks
 
+_EMB = None
+_EMB_LOCK = threading.Lock()
+
+
+def get_embeddings() -> HuggingFaceEmbeddings:
+    """
+    Shared embedding model, loaded once per process. Embeds in batches of
+    128 with normalized outputs, on GPU when one is available.
+    """
+    global _EMB
+    if _EMB is None:
+        with _EMB_LOCK:
+            if _EMB is None:
+                try:
+                    import torch
+                    device = "cuda" if torch.cuda.is_available() else "cpu"
+                except Exception:
+                    device = "cpu"
+                model_kwargs = {"device": device}
+                # Set EMBEDDINGS_BACKEND=onnx to use a quantized export
+                # (sentence-transformers >= 3 only).
+                backend = os.environ.get("EMBEDDINGS_BACKEND")
+                if backend:
+                    model_kwargs["backend"] = backend
+                _EMB = HuggingFaceEmbeddings(
+                    model_name="sentence-transformers/all-MiniLM-L6-v2",
+                    model_kwargs=model_kwargs,
+                    encode_kwargs={"batch_size": 128, "normalize_embeddings": True},
+                )
+    return _EMB
+
+
+# Below this many chunks brute-force flat search is already fast; above
+# it, build an HNSW index for sub-linear retrieval.
+HNSW_THRESHOLD = 256
+HNSW_M = 32
+
+
 def build_vectorstore(chunks: List[str]) -> LangchainFAISS:
-    hf_embeddings = HuggingFaceEmbeddings(
-        model_name="sentence-transformers/all-MiniLM-L6-v2"
+    embeddings = get_embeddings()
+    if len(chunks) >= HNSW_THRESHOLD:
+        try:
+            return _build_hnsw_vectorstore(chunks, embeddings)
+        except Exception:
+            pass  # fall back to the default flat index
+    return LangchainFAISS.from_texts(chunks, embeddings)
+
+
+def _build_hnsw_vectorstore(chunks: List[str], embeddings) -> LangchainFAISS:
+    import faiss
+    import numpy as np
+    from langchain.docstore.document import Document
+    from langchain.docstore.in_memory import InMemoryDocstore
+
+    vectors = np.asarray(embeddings.embed_documents(chunks), dtype="float32")
+    index = faiss.IndexHNSWFlat(vectors.shape[1], HNSW_M)
+    index.hnsw.efConstruction = 80
+    index.hnsw.efSearch = 32
+    index.add(vectors)
+
+    ids = [str(i) for i in range(len(chunks))]
+    docstore = InMemoryDocstore(
+        {doc_id: Document(page_content=chunk) for doc_id, chunk in zip(ids, chunks)}
+    )
+    return LangchainFAISS(
+        embedding_function=embeddings.embed_query,
+        index=index,
+        docstore=docstore,
+        index_to_docstore_id=dict(enumerate(ids)),
     )
-    vectorstore = LangchainFAISS.from_texts(chunks, hf_embeddings)
-    return vectorstore
 
 
 def run_rag_extraction(vectorstore: LangchainFAISS, user_question: str) -> str:
@@ -61,21 +150,43 @@ def run_rag_extraction(vectorstore: LangchainFAISS, user_question: str) -> str:
         output = response.choices[0].message.content
         return output
     except Exception as e:
-        return f"Groq LLM request failed: {e}"
+        return f"{LLM_ERROR_PREFIX}: {e}"
 
-def run_pdf(pdf_path: str) -> LangchainFAISS:
+def run_pdf(pdf_source) -> LangchainFAISS:
     """
-    Creates embeddings for the PDF and returns the vectorstore
+    Creates embeddings for the PDF (path or file-like object) and
+    returns the vectorstore
     """
-    text = pdf_to_text(pdf_path)
+    text = pdf_to_text(pdf_source)
     chunks = chunk_text(text)
     vectorstore = build_vectorstore(chunks)
     return vectorstore
 
 
+def save_vectorstore(vectorstore: LangchainFAISS, path: str):
+    vectorstore.save_local(path)
+
+
+def load_vectorstore(path: str) -> LangchainFAISS:
+    try:
+        return LangchainFAISS.load_local(
+            path, get_embeddings(), allow_dangerous_deserialization=True
+        )
+    except TypeError:
+        # older langchain without the flag
+        return LangchainFAISS.load_local(path, get_embeddings())
+
+
 class PDFChat:
-    def __init__(self, pdf_path: str):
-        self.vectorstore = run_pdf(pdf_path)
+    def __init__(self, pdf_path: str = None, vectorstore: LangchainFAISS = None):
+        # Accept a pre-built vectorstore so callers that already embedded
+        # the PDF don't embed it a second time.
+        if vectorstore is not None:
+            self.vectorstore = vectorstore
+        elif pdf_path is not None:
+            self.vectorstore = run_pdf(pdf_path)
+        else:
+            raise ValueError("Either pdf_path or vectorstore must be provided")
 
     def ask(self, question: str) -> str:
         answer = run_rag_extraction(self.vectorstore, question)
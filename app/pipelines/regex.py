@@ -4,11 +4,15 @@ from typing import Dict, Any, Optional
 from datetime import datetime
 import docx
 import pdfplumber
-
-class FinancialDocumentParser:
-    def __init__(self):
-        # Regular expressions to extract key financial entities
-        self.entity_patterns = {
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+# Regular expressions to extract key financial entities. Compiled once at
+# import time; run_regex builds a parser per request, so compiling in
+# __init__ would redo the work (and blow the re cache) on every upload.
+RAW_ENTITY_PATTERNS = {
             'party_a': r'^Party A\s*(?::|\||\t)\s*(.+)$',
             'party_b': r'^Party B\s*(?::|\||\t)\s*(.+)$',
             'trade_date': r'^Trade Date\s*(?::|\||\t)\s*(\d{1,2}\s+\w+\s+\d{4})$',
@@ -30,7 +34,128 @@ class FinancialDocumentParser:
             'future_price_valuation': r'^Future Price Valuation\s*(?::|\||\t)\s*([^\n]+)$',
             'calculation_agent': r'^Calculation Agent\s*(?::|\||\t)\s*([^\n]+)$',
             'isda_doc': r'^ISDA Documentation\s*(?::|\||\t)\s*([^\n]+)$',
-        }
+}
+
+ENTITY_PATTERNS = {
+    k: re.compile(p, re.IGNORECASE | re.MULTILINE) for k, p in RAW_ENTITY_PATTERNS.items()
+}
+
+# Optional Hyperscan prefilter: compiles all entity patterns into one
+# database so the document is scanned once instead of ~20 times. Hyperscan
+# has no capture groups, so it only tells us which patterns hit; the
+# matching stdlib patterns are then re-run to extract the groups.
+try:
+    import hyperscan as _hs
+except ImportError:
+    _hs = None
+
+_HS_KEYS = list(RAW_ENTITY_PATTERNS)
+_HS_DB = None
+if _hs is not None:
+    try:
+        _HS_DB = _hs.Database()
+        _HS_DB.compile(
+            expressions=[RAW_ENTITY_PATTERNS[k].encode() for k in _HS_KEYS],
+            ids=list(range(len(_HS_KEYS))),
+            flags=[_hs.HS_FLAG_CASELESS | _hs.HS_FLAG_MULTILINE | _hs.HS_FLAG_SINGLEMATCH] * len(_HS_KEYS),
+        )
+    except Exception:
+        _HS_DB = None
+
+_INTEREST_LINE_RE = re.compile(r'^Interest Payments', re.IGNORECASE)
+_SPLIT_AND_RE = re.compile(r'\s*and\s*', re.IGNORECASE)
+# Whitespace-run collapsing split into two pure-C substitutions: runs
+# containing a tab become one tab, remaining space runs become one space.
+_TAB_RUN_RE = re.compile(r'[ \t]*\t[ \t]*')
+_SPACE_RUN_RE = re.compile(r' {2,}')
+_LEAD_PIPE_RE = re.compile(r'^\|+\s*')
+_CLEAN_WS_RE = re.compile(r'\s+')
+_NOTIONAL_RE = re.compile(
+    r'^(?P<ccy>[A-Z]{3})\s+(?P<num>[\d.,]+|\d+(?:\.\d+)?)\s*(?P<scale>million|thousand|bn|mm|m|k|b)?(?:\s+(?P<unit>\w+))?$',
+    re.IGNORECASE
+)
+_BARRIER_PCT_RE = re.compile(r'(\d+(?:\.\d+)?)\s*%')
+_BARRIER_REF_RE = re.compile(r'of\s+([A-Za-z0-9_]+)', re.IGNORECASE)
+
+# Fast path for the entity patterns above: almost all of them are anchored
+# "Key <sep> value" lines, so one pass splitting each line on the first
+# ':', '|' or tab plus an O(1) key lookup replaces ~20 whole-document
+# scans. Keys with a constrained value shape are re-validated against a
+# value-only pattern; anything the pass misses falls back to the full scan.
+_KV_RE = re.compile(r'^([^:\t|]+?)\s*[:|\t]\s*(.+)$')
+_KV_PAREN_RE = re.compile(r'\([^)]*\)')
+_KV_KEY_WS_RE = re.compile(r'\s+')
+_KV_ALIASES = {
+    'party_a': 'party_a',
+    'party_b': 'party_b',
+    'trade_date': 'trade_date',
+    'trade_time': 'trade_time',
+    'initial_valuation_date': 'initial_valuation_date',
+    'effective_date': 'effective_date',
+    'valuation_date': 'valuation_date',
+    'termination_date': 'termination_date',
+    'maturity': 'termination_date',
+    'notional_amount': 'notional_amount',
+    'upfront_payment': 'upfront_payment',
+    'underlying': 'underlying',
+    'exchange': 'exchange',
+    'coupon': 'coupon',
+    'barrier': 'barrier',
+    'interest_payments': 'interest_payments',
+    'initial_price': 'initial_price',
+    'sharefinal': 'final_price',
+    'business_day': 'business_day',
+    'future_price_valuation': 'future_price_valuation',
+    'calculation_agent': 'calculation_agent',
+    'isda_documentation': 'isda_doc',
+}
+_DATE_VALUE_RE = re.compile(r'^(\d{1,2}\s+\w+\s+\d{4})$', re.IGNORECASE)
+_KV_VALUE_PATTERNS = {
+    'trade_date': _DATE_VALUE_RE,
+    'initial_valuation_date': _DATE_VALUE_RE,
+    'effective_date': _DATE_VALUE_RE,
+    'valuation_date': _DATE_VALUE_RE,
+    'termination_date': _DATE_VALUE_RE,
+    'trade_time': re.compile(r'^(\d{2}:\d{2}:\d{2})$'),
+    'notional_amount': re.compile(
+        r'^([A-Z]{3}\s+[\d,.\s]+(?:million|thousand|bn|mm|m|k|b)?(?:\s+\w+)?)$', re.IGNORECASE
+    ),
+    'underlying': re.compile(
+        r'^([^(]+)\(ISIN\s+([A-Z0-9]+),\s*Reuters:\s*([A-Z0-9.]+)\)\s*$', re.IGNORECASE
+    ),
+}
+
+# Notional scale words mapped to small ids so the numeric core below is a
+# plain float/int function that Numba can JIT when it is installed.
+_SCALE_IDS = {
+    'thousand': 1, 'k': 1,
+    'million': 2, 'm': 2, 'mm': 2,
+    'bn': 3, 'b': 3, 'billion': 3,
+}
+_SCALE_MULTIPLIERS = (1.0, 1e3, 1e6, 1e9)
+
+try:
+    from numba import njit
+
+    @njit(cache=True)
+    def _apply_scale(x, scale_id):
+        if scale_id == 1:
+            return x * 1e3
+        if scale_id == 2:
+            return x * 1e6
+        if scale_id == 3:
+            return x * 1e9
+        return x
+
+    _apply_scale(1.0, 0)  # compile at import, not inside the first request
+except ImportError:
+    def _apply_scale(x, scale_id):
+        return x * _SCALE_MULTIPLIERS[scale_id]
+
+
+class FinancialDocumentParser:
+    def __init__(self):
+        self.entity_patterns = ENTITY_PATTERNS
 
     def extract_from_docx(self, file_path: str) -> Dict[str, Any]:
 
@@ -57,24 +182,76 @@ class FinancialDocumentParser:
 
         return self.extract_and_structure_entities(self.preprocess_text(text))
 
-    def extract_and_structure_entities(self, text: str) -> Dict[str, Any]:
-        # First, extract raw entities using regex patterns
+    def candidate_patterns(self, text: str) -> Dict[str, 're.Pattern']:
+        # One combined Hyperscan scan to find which patterns can hit at all;
+        # without Hyperscan every pattern is a candidate.
+        if _HS_DB is None:
+            return self.entity_patterns
+        hits = set()
+
+        def on_match(pat_id, start, end, flags, ctx):
+            hits.add(_HS_KEYS[pat_id])
+
+        try:
+            _HS_DB.scan(text.encode('utf-8', 'ignore'), match_event_handler=on_match)
+        except Exception:
+            return self.entity_patterns
+        return {k: p for k, p in self.entity_patterns.items() if k in hits}
+
+    def extract_key_values(self, text: str) -> Dict[str, Any]:
+        # Single pass over the (already normalized) lines: split on the
+        # first separator, map the key through the alias table, and only
+        # run a value-shaped regex where the original pattern constrained
+        # the value.
         raw = {}
-        for key, pattern in self.entity_patterns.items():
-            m = re.search(pattern, text, re.IGNORECASE | re.MULTILINE)
+        for line in text.split('\n'):
+            m = _KV_RE.match(line)
             if not m:
                 continue
-
-            if m.lastindex and m.lastindex > 1:
-                raw[key] = [self.clean_value(g) for g in m.groups()]
+            key = _KV_ALIASES.get(
+                _KV_KEY_WS_RE.sub('_', _KV_PAREN_RE.sub('', m.group(1)).strip().lower())
+            )
+            if key is None or key in raw:
+                continue
+            value_pattern = _KV_VALUE_PATTERNS.get(key)
+            if value_pattern is None:
+                raw[key] = self.clean_value(m.group(2))
+                continue
+            vm = value_pattern.match(m.group(2))
+            if not vm:
+                continue
+            if vm.lastindex and vm.lastindex > 1:
+                raw[key] = [self.clean_value(g) for g in vm.groups()]
             else:
-                raw[key] = self.clean_value(m.group(1)) if m.group(1) else None
+                raw[key] = self.clean_value(vm.group(1))
+        return raw
+
+    def extract_and_structure_entities(self, text: str) -> Dict[str, Any]:
+        # First, extract raw entities from key/value lines in one pass,
+        # then fall back to the per-pattern document scan for anything
+        # that pass didn't produce.
+        raw = self.extract_key_values(text)
+        missing = {
+            k: p for k, p in self.entity_patterns.items() if k not in raw
+        }
+        if missing:
+            for key, pattern in self.candidate_patterns(text).items():
+                if key not in missing:
+                    continue
+                m = pattern.search(text)
+                if not m:
+                    continue
+
+                if m.lastindex and m.lastindex > 1:
+                    raw[key] = [self.clean_value(g) for g in m.groups()]
+                else:
+                    raw[key] = self.clean_value(m.group(1)) if m.group(1) else None
 
         # Handle special case for interest payments
         if raw.get('interest_payments') in (None, "Interest Payments"):
             lines = text.split("\n")
             for i, line in enumerate(lines):
-                if re.match(r'^Interest Payments', line, re.IGNORECASE):
+                if _INTEREST_LINE_RE.match(line):
                     if i + 1 < len(lines):
                         raw['interest_payments'] = self.clean_value(lines[i + 1])
                     break
@@ -142,7 +319,7 @@ class FinancialDocumentParser:
 
         # Calculation agent(s)
         if r.get('calculation_agent'):
-            agents = [a.strip() for a in re.split(r'\s*and\s*', r['calculation_agent'], flags=re.IGNORECASE)]
+            agents = [a.strip() for a in _SPLIT_AND_RE.split(r['calculation_agent'])]
             out['CalculationAgent'] = agents if len(agents) > 1 else agents[0]
 
         # Remove None values
@@ -151,13 +328,14 @@ class FinancialDocumentParser:
     def preprocess_text(self, s: str) -> str:
         # Normalize line endings and whitespace
         s = s.replace('\r\n', '\n').replace('\r', '\n')
-        s = re.sub(r'[ \t]+', lambda m: '\t' if '\t' in m.group(0) else ' ', s)
-        return '\n'.join(line.strip() for line in s.split('\n') if line.strip())
+        s = _TAB_RUN_RE.sub('\t', s)
+        s = _SPACE_RUN_RE.sub(' ', s)
+        return '\n'.join(filter(None, (line.strip() for line in s.split('\n'))))
 
     def clean_value(self, v: str) -> str:
         v = v.strip()
-        v = re.sub(r'^\|+\s*', '', v)
-        return re.sub(r'\s+', ' ', v).strip()
+        v = _LEAD_PIPE_RE.sub('', v)
+        return _CLEAN_WS_RE.sub(' ', v).strip()
 
     def std_date(self, date_str: Optional[str]) -> Optional[str]:
         if not date_str:
@@ -168,10 +346,7 @@ class FinancialDocumentParser:
             return date_str
 
     def parse_notional(self, s: str) -> Optional[Dict[str, Any]]:
-        m = re.search(
-            r'^(?P<ccy>[A-Z]{3})\s+(?P<num>[\d.,]+|\d+(?:\.\d+)?)\s*(?P<scale>million|thousand|bn|mm|m|k|b)?(?:\s+(?P<unit>\w+))?$',
-            s.strip(), re.IGNORECASE
-        )
+        m = _NOTIONAL_RE.search(s.strip())
         if not m:
             return None
 
@@ -181,20 +356,16 @@ class FinancialDocumentParser:
         except ValueError:
             return None
 
-        mult = {
-            'thousand': 1e3, 'k': 1e3,
-            'million': 1e6, 'm': 1e6, 'mm': 1e6,
-            'bn': 1e9, 'b': 1e9, 'billion': 1e9
-        }.get(scale, 1)
+        amount = _apply_scale(num, _SCALE_IDS.get(scale, 0))
 
-        return {'amount': num * mult, 'currency': ccy, **({'unit': unit} if unit else {})}
+        return {'amount': amount, 'currency': ccy, **({'unit': unit} if unit else {})}
 
     def parse_barrier(self, s: str):
-        m = re.search(r'(\d+(?:\.\d+)?)\s*%', s.strip())
+        m = _BARRIER_PCT_RE.search(s.strip())
         val = float(m.group(1)) if m else None
 
         ref = None
-        m2 = re.search(r'of\s+([A-Za-z0-9_]+)', s, re.IGNORECASE)
+        m2 = _BARRIER_REF_RE.search(s)
         if m2:
             ref = m2.group(1)
 
@@ -226,8 +397,15 @@ def run_regex(file):
 
     # PDF file
     if filename.lower().endswith(".pdf") or content_type == "application/pdf":
-        with pdfplumber.open(file.file) as pdf:
-            text = "\n".join(page.extract_text() or "" for page in pdf.pages)
+        if pdfium is not None:
+            pdf = pdfium.PdfDocument(file.file)
+            try:
+                text = "\n".join(page.get_textpage().get_text_range() for page in pdf)
+            finally:
+                pdf.close()
+        else:
+            with pdfplumber.open(file.file) as pdf:
+                text = "\n".join(page.extract_text() or "" for page in pdf.pages)
         return parser.extract_from_text(text)
 
     # DOCX file
@@ -1,15 +1,82 @@
 from fastapi import APIRouter, UploadFile, File
-import tempfile
+import asyncio
+import hashlib
+import os
+from cachetools import LRUCache, TTLCache
 from app.utils.file import detect_file_type
 from app.pipelines.regex import run_regex
-from app.pipelines.ner import run_ner
-from app.pipelines.pdf import run_pdf, PDFChat 
+from app.pipelines.batcher import ner_batcher
+from app.pipelines.pdf import (
+    LLM_ERROR_PREFIX,
+    PDFChat,
+    load_vectorstore,
+    run_pdf,
+    save_vectorstore,
+)
 import uuid
 
 
+try:
+    import redis as _redis
+except ImportError:
+    _redis = None
+
+
 router = APIRouter()
 
-pdf_chats = {}
+PDF_TTL = 3600
+
+# Bounded: chats expire after an hour instead of accumulating forever.
+# With Redis available this acts as a per-worker warm cache; the
+# authoritative pdf_id -> saved-index-path mapping lives in Redis so any
+# uvicorn worker (or a restarted one) can serve an existing pdf_id.
+pdf_chats = TTLCache(maxsize=128, ttl=PDF_TTL)
+
+redis_client = None
+if _redis is not None:
+    try:
+        redis_client = _redis.Redis.from_url(
+            os.environ.get("REDIS_URL", "redis://localhost:6379/0")
+        )
+        redis_client.ping()
+    except Exception:
+        redis_client = None
+
+# Answers keyed by (pdf_id, normalized question) — the Streamlit UI
+# happily re-asks the same question on re-render, and a hit skips the
+# whole retrieval + remote LLM round-trip.
+answer_cache = LRUCache(maxsize=1024)
+
+# Vectorstores keyed by SHA-1 of the PDF bytes, so re-uploading the same
+# document never re-embeds it. Persisted under cache/ to survive restarts.
+vectorstore_cache = {}
+VECTORSTORE_CACHE_DIR = "cache"
+READ_CHUNK = 1 << 20  # 1 MiB
+
+
+def get_vectorstore(fileobj):
+    # Hash the upload in fixed-size chunks straight off the spooled file
+    # object — the whole PDF is never held in a bytes object — then hand
+    # the same file object to the parser, which takes file-likes directly.
+    sha = hashlib.sha1()
+    for chunk in iter(lambda: fileobj.read(READ_CHUNK), b""):
+        sha.update(chunk)
+    h = sha.hexdigest()
+    fileobj.seek(0)
+
+    path = os.path.join(VECTORSTORE_CACHE_DIR, h)
+    vs = vectorstore_cache.get(h)
+    if vs is not None:
+        return vs, path
+
+    if os.path.isdir(path):
+        vs = load_vectorstore(path)
+    else:
+        vs = run_pdf(fileobj)
+        save_vectorstore(vs, path)
+
+    vectorstore_cache[h] = vs
+    return vs, path
 
 @router.post("/upload")
 async def upload_file(file: UploadFile = File(...)):
@@ -18,28 +85,25 @@ async def upload_file(file: UploadFile = File(...)):
 
     
     if file_type == "docx":
-        result = run_regex(file)
+        result = await asyncio.to_thread(run_regex, file)
 
     
     elif file_type == "txt":
         content = await file.read()
         text_content = content.decode("utf-8", errors="ignore")
-        result = run_ner(text_content=text_content)
+        result = await ner_batcher.submit(text_content)
 
     
     elif file_type == "pdf":
-        
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-            tmp.write(await file.read())
-            tmp_path = tmp.name
+        vectorstore, index_path = await asyncio.to_thread(get_vectorstore, file.file)
 
-        
-        result = run_pdf(tmp_path)
-
-       
         pdf_id = str(uuid.uuid4())
-        chat_instance = PDFChat(tmp_path)
-        pdf_chats[pdf_id] = chat_instance 
+        pdf_chats[pdf_id] = PDFChat(vectorstore=vectorstore)
+        if redis_client is not None:
+            try:
+                redis_client.setex(f"pdf:{pdf_id}", PDF_TTL, index_path)
+            except Exception:
+                pass  # local cache still serves this worker
 
         return {"file_type": file_type, "result": "Embeddings created successfully", "pdf_id": pdf_id}
 
@@ -51,9 +115,34 @@ async def upload_file(file: UploadFile = File(...)):
 
 @router.post("/ask_pdf")
 async def ask_pdf(pdf_id: str, question: str):
-    if pdf_id not in pdf_chats:
-        return {"error": "Invalid PDF ID or PDF not uploaded"}
+    chat_instance = pdf_chats.get(pdf_id)
+    if chat_instance is None and redis_client is not None:
+        # Another worker (or a previous incarnation of this one) did the
+        # upload; rebuild the chat from the saved index.
+        try:
+            index_path = redis_client.get(f"pdf:{pdf_id}")
+        except Exception:
+            index_path = None
+        if index_path:
+            # The Redis entry can outlive the saved index (cache/ cleaned
+            # up, or written by a different host); treat a failed load
+            # like an unknown pdf_id rather than 500ing.
+            try:
+                vs = await asyncio.to_thread(load_vectorstore, index_path.decode())
+            except Exception:
+                vs = None
+            if vs is not None:
+                chat_instance = PDFChat(vectorstore=vs)
+                pdf_chats[pdf_id] = chat_instance
 
-    chat_instance = pdf_chats[pdf_id]
-    answer = chat_instance.ask(question)
+    if chat_instance is None:
+        return {"error": "Invalid PDF ID or PDF not uploaded"}
+    cache_key = (pdf_id, question.strip().lower())
+    answer = answer_cache.get(cache_key)
+    if answer is None:
+        answer = await asyncio.to_thread(chat_instance.ask, question)
+        # Don't cache LLM failures — a transient network error would be
+        # served for this (pdf_id, question) until eviction.
+        if not answer.startswith(LLM_ERROR_PREFIX):
+            answer_cache[cache_key] = answer
     return {"question": question, "answer": answer}